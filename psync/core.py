@@ -6,6 +6,7 @@ import os
 import stat
 import logging
 import tempfile
+import itertools
 from enum import Enum
 from pathlib import Path
 from dataclasses import fields
@@ -940,18 +941,36 @@ class SyncRunner:
 				if progress:
 					full_task = progress.add_task("Syncing...", total=len(operations))
 
-				for op in operations:
-					if any(op.depends_on(failed_op) for failed_op, _ in results.sync_errors):
-						config.logger.debug(f"Chain failure: {op.summary}")
+				def unblocked_operations():
+					for op in operations:
+						if any(op.depends_on(failed_op) for failed_op, _ in results.sync_errors):
+							config.logger.debug(f"Chain failure: {op.summary}")
+							continue
+						yield op
+
+				# Adjacent copies into the same dst dir are performed as one batch so the batch can share setup work (e.g., creating the dir).
+				# Other operations get a unique key so each is performed on its own.
+				# Batches are consumed lazily: the next op isn't generated (or checked for a chain failure) until the previous one has been performed.
+				unique_keys = itertools.count()
+				batch_key = lambda op: (type(op), op.dst.real[:-1]) if op.batchable else next(unique_keys)
+
+				for _, group in itertools.groupby(unblocked_operations(), key=batch_key):
+					first = next(group)
+					batch = itertools.chain((first,), group)
+
+					if config.dry_run:
+						for op in batch:
+							config.logger.info(op.summary, extra={"Operation": type(op).__name__})
+							if progress:
+								progress.update(full_task, advance=1)
 						continue
 
-					config.logger.info(op.summary, extra={"Operation": type(op).__name__})
-
-					if not config.dry_run:
-						try:
-							op.perform()
+					# each op is logged as soon as it's performed, so the log keeps its order with warnings raised while performing the next op
+					for op, e in type(first).perform_many(batch):
+						config.logger.info(op.summary, extra={"Operation": type(op).__name__})
+						if e is None:
 							results.tally_success(op)
-						except OSError as e:
+						else:
 							results.tally_failure(op, e)
 							if config.debug & Sync.RAISE_FS_ERRORS:
 								raise e
@@ -960,8 +979,8 @@ class SyncRunner:
 							else:
 								config.logger.error(_exc_summary(e))
 
-					if progress:
-						progress.update(full_task, advance=1)
+						if progress:
+							progress.update(full_task, advance=1)
 
 			results.status = Results.Status.COMPLETED
 		except KeyboardInterrupt as e:
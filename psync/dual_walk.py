@@ -2,55 +2,100 @@
 # GNU General Public License v3.0
 
 import os
-import ntpath
+import sys
+import logging
+import itertools
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Any, Iterator, cast, ContextManager, TypeVar
+from typing import Iterator, cast, ContextManager, TypeVar, NamedTuple
 from collections import namedtuple
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor, Future
 
 from .config import _SyncConfig
 from .ordered_set import OrderedSet
 from .types import _AbstractPath
 from .sftp import RemotePath, _RemotePathScanner
 from .errors import IncompatiblePathError
-from .helpers import _merge_iters, _reverse_dict
+from .helpers import _reverse_dict, _is_reserved_nt_name
 from .log import _exc_summary
 
 P = TypeVar("P", bound=_AbstractPath) # for dir_list
 
-@dataclass(frozen=True)
-class _Metadata:
+class _Metadata(NamedTuple):
 	'''File metadata that will be used to find probable matches when searching for renames.'''
 
-	size  : int
-	mtime : float
+	# a NamedTuple, since these are used as dict keys for every file and tuples hash and compare in C
+	size   : int
+	mtime  : float
+
+_PathStyle = namedtuple("_PathStyle", ["sep", "dst_sys"])
+
+# Every entry in a walk has the same sep and dst_sys, so they share one _PathStyle instead of each storing both strings.
+_path_styles: dict[tuple[str, str], _PathStyle] = {}
 
-@dataclass(frozen=True, repr=False, eq=False, order=False, unsafe_hash=False)
 class _Relpath:
-	'''Filesystem entries yielded by `DualWalk.dir_list()`.'''
+	'''Filesystem entries yielded by `DualWalk.dir_list()`. Treat as immutable.'''
+
+	# a plain class with __slots__ instead of a frozen dataclass, since millions of these may be created
+	__slots__ = ("relpath", "_style", "real", "norm", "_real_hash")
 
 	relpath    : str
-	sep        : str
-	dst_sys    : str
-	real       : tuple[str] = ("",)
-	norm       : tuple[str] = ("",)
-	_real_hash : int = 0
-	_norm_hash : int = 0
-
-	def __post_init__(self):
-		object.__setattr__(self, "real", tuple(self.relpath.split(self.sep)))
-		if self.dst_sys == "nt":
-			if (self.sep == "/" and "\\" in self.relpath) or ntpath.isreserved(self.relpath):
-				raise IncompatiblePathError("Incompatible path for this system", str(self.relpath))
-			object.__setattr__(self, "norm", tuple(p.lower() for p in self.real))
+	_style     : _PathStyle
+	real       : tuple[str, ...]
+	norm       : tuple[str, ...]
+	_real_hash : int
+
+	def __init__(self, relpath:str, sep:str, dst_sys:str, *, parent_dir:"_Dir|None" = None):
+		'''`parent_dir` is the dir containing this entry, if known, so its parts don't need to be split and checked again.'''
+
+		self.relpath = relpath
+		if parent_dir is not None:
+			self._style = parent_dir._style
 		else:
-			object.__setattr__(self, "norm", self.real)
+			style = _path_styles.get((sep, dst_sys))
+			if style is None:
+				style = _path_styles[(sep, dst_sys)] = _PathStyle(sep, dst_sys)
+			self._style = style
+
+		if parent_dir is None or parent_dir.relpath == ".":
+			parent_dir = None
+			new_part = relpath
+			real = tuple(relpath.split(sep))
+		else:
+			new_part = relpath[len(parent_dir.relpath) + len(sep):]
+			if isinstance(self, _Dir):
+				# Dir names are repeated in the parts of every entry below them, in both roots, so intern them to share one string and let tuple comparisons short-circuit on identity.
+				new_part = sys.intern(new_part)
+			real = parent_dir.real + (new_part,)
+		if dst_sys == "nt":
+			# only the new part needs checking, the parent's parts were checked when it was created
+			if any(_is_reserved_nt_name(part) for part in (real if parent_dir is None else (new_part,))):
+				raise IncompatiblePathError("Incompatible path for this system", str(relpath))
+			if parent_dir is None:
+				norm = tuple(relpath.lower().split(sep)) # seps are unaffected by lower()
+			elif isinstance(self, _Dir):
+				norm = parent_dir.norm + (sys.intern(new_part.lower()),)
+			else:
+				norm = parent_dir.norm + (new_part.lower(),)
+		else:
+			norm = real
+
+		self.real       = real
+		self.norm       = norm
+		self._real_hash = hash(real)
+
+		# Asserts still run for every entry unless optimizations are on, so check the locals, and only the new part when the parent's were already checked.
+		assert real[-1] != ""
+		assert ".." not in (real if parent_dir is None else (new_part,))
 
-		object.__setattr__(self, "_real_hash", hash(self.real))
-		object.__setattr__(self, "_norm_hash",  hash(self.norm))
+	@property
+	def sep(self) -> str:
+		return self._style.sep
 
-		assert self.name != ""
-		assert ".." not in self.norm
+	@property
+	def dst_sys(self) -> str:
+		return self._style.dst_sys
 
 	@property
 	def name(self):
@@ -62,9 +107,18 @@ class _Relpath:
 
 	@property
 	def parent(self):
-		if len(self.norm) == 1:
+		norm = self.norm
+		if len(norm) == 1:
 			return None
-		return _Dir(self.sep.join(self.real[:-1]), self.sep, self.dst_sys)
+		# The parent's parts were already split and checked when this entry was created, so slice them instead of going through __init__ again.
+		real = self.real[:-1]
+		parent = _Dir.__new__(_Dir)
+		parent.relpath    = self._style.sep.join(real)
+		parent._style     = self._style
+		parent.real       = real
+		parent.norm       = norm[:-1]
+		parent._real_hash = hash(real)
+		return parent
 
 	def __eq__(self, other):
 		return self.real == other.real
@@ -98,40 +152,18 @@ class _Relpath:
 	def is_relative_to(self, other):
 		if other.relpath == ".":
 			return True
-		if all(a==b for a,b in zip(self.norm, other.norm)):
+		if _in_lineage(self.norm, other.norm):
 			return len(self.norm) >= len(other.norm)
 		return False
 
-@dataclass(frozen=True, repr=False, eq=False, order=False, unsafe_hash=False)
 class _File(_Relpath):
-	pass
+	__slots__ = ()
 
-@dataclass(frozen=True, repr=False, eq=False, order=False, unsafe_hash=False)
 class _Symlink(_File): # TODO use this to replace is_symlink() check inside _operations
-	pass
+	__slots__ = ()
 
-@dataclass(frozen=True, repr=False, eq=False, order=False, unsafe_hash=False)
 class _Dir(_Relpath):
-	pass
-
-class _Normalized:
-	'''Wrapper for `_Relpath` to base its hash calculation on its norm property.'''
-
-	def __init__(self, relpath: _Relpath):
-		self._wrapped: _Relpath = relpath
-
-	@property
-	def unwrapped(self) -> _Relpath:
-		return self._wrapped
-
-	def __hash__(self):
-		return self._wrapped._norm_hash
-
-	def __eq__(self, other):
-		return self._wrapped.norm == other._wrapped.norm
-
-	def __lt__(self, other:"_Normalized"):
-		return self._wrapped.norm < other._wrapped.norm
+	__slots__ = ()
 
 _DirList = namedtuple("_DirList", [
 	"parent_dir",
@@ -139,10 +171,11 @@ _DirList = namedtuple("_DirList", [
 	"files",
 	"dir_size",
 	"file_metadata",
+	"file_ids",
 	"nonstandard_files",
 ])
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class _Diff:
 	'''A diff between two directories.'''
 
@@ -151,20 +184,24 @@ class _Diff:
 	dst_parent          : _Dir|None              = None
 	src_file_metadata   : dict[_File, _Metadata] = field(default_factory=dict)
 	dst_file_metadata   : dict[_File, _Metadata] = field(default_factory=dict)
+	src_file_ids        : dict[_File, tuple[int, int]] = field(default_factory=dict) # (st_dev, st_ino) of local files, used to find entries that are the same file in both roots. Empty unless renames are on and both roots are on the same device.
+	dst_file_ids        : dict[_File, tuple[int, int]] = field(default_factory=dict)
 	src_only_dirs       : OrderedSet[_Dir]       = field(default_factory=OrderedSet)
 	dst_only_dirs       : OrderedSet[_Dir]       = field(default_factory=OrderedSet)
 	src_only_files      : OrderedSet[_File]      = field(default_factory=OrderedSet)
 	dst_only_files      : OrderedSet[_File]      = field(default_factory=OrderedSet)
 	dir_matches         : dict[_Dir, _Dir]       = field(default_factory=dict)
 	file_matches        : dict[_File, _File]     = field(default_factory=dict)
-	ignored_src_entries : OrderedSet[_Relpath]   = field(default_factory=OrderedSet)
-	ignored_dst_entries : OrderedSet[_Relpath]   = field(default_factory=OrderedSet)
+	ignored_src_entries : set[str]               = field(default_factory=set) # relpaths, only used for membership tests
+	ignored_dst_entries : set[str]               = field(default_factory=set)
 
 	def update(self, other: "_Diff"):
 		'''Combine two diffs.'''
 
 		self.src_file_metadata.update(other.src_file_metadata)
 		self.dst_file_metadata.update(other.dst_file_metadata)
+		self.src_file_ids.update(other.src_file_ids)
+		self.dst_file_ids.update(other.dst_file_ids)
 		self.src_only_dirs.update(other.src_only_dirs)
 		self.dst_only_dirs.update(other.dst_only_dirs)
 		self.src_only_files.update(other.src_only_files)
@@ -179,30 +216,64 @@ class _Diff:
 
 		rename_map: dict[_File, _File] = {}
 
-		if self.src_file_metadata is None or self.dst_file_metadata is None:
+		# In low memory mode this runs for every dir, so don't build the grouping dicts below when one side has no files to pair.
+		if not self.src_file_metadata or not self.dst_file_metadata:
 			return rename_map
 
-		src_meta_to_relpath = _reverse_dict({k:v for k,v in self.src_file_metadata.items() if k not in self.ignored_src_entries})
-		dst_meta_to_relpath = _reverse_dict({k:v for k,v in self.dst_file_metadata.items() if k not in self.ignored_dst_entries})
-
-		unique_src = set(k for k,v in src_meta_to_relpath.items() if v is not None and k.size >= self.config.rename_threshold)
-		unique_dst = set(k for k,v in dst_meta_to_relpath.items() if v is not None and k.size >= self.config.rename_threshold)
-		matched_meta = unique_src.intersection(unique_dst)
-
-		for meta in matched_meta:
-			src_file = src_meta_to_relpath[meta]
-			dst_file = dst_meta_to_relpath[meta]
-
-			if src_file == dst_file:
+		threshold = self.config.rename_threshold
+		# File IDs are only collected when both roots are local and on the same device.
+		use_fileids = bool(self.src_file_ids) and bool(self.dst_file_ids)
+
+		# Group rename candidates by metadata and by file ID, one pass over each side.
+		# A value of None means the key is shared by more than one file.
+		src_by_meta : dict[_Metadata, _File|None] = {}
+		dst_by_meta : dict[_Metadata, _File|None] = {}
+		src_by_id   : dict[tuple[int, int], _File|None] = {}
+		dst_by_id   : dict[tuple[int, int], _File|None] = {}
+		for file_metadata, file_ids, ignored, by_meta, by_id in (
+			(self.src_file_metadata, self.src_file_ids, self.ignored_src_entries, src_by_meta, src_by_id),
+			(self.dst_file_metadata, self.dst_file_ids, self.ignored_dst_entries, dst_by_meta, dst_by_id),
+		):
+			for file, meta in file_metadata.items():
+				if meta.size < threshold or file.relpath in ignored:
+					continue
+				# setdefault() is a single probe when the key is new, which is the usual case
+				if by_meta.setdefault(meta, file) is not file:
+					by_meta[meta] = None
+			if use_fileids:
+				for file, fileid in file_ids.items():
+					if file_metadata[file].size < threshold or file.relpath in ignored:
+						continue
+					if by_id.setdefault(fileid, file) is not file:
+						by_id[fileid] = None
+
+		# Entries that are the same file on disk (e.g., hard links shared by both roots) are certain matches, even when their metadata is ambiguous.
+		src_matched_by_id: set[_File] = set()
+		dst_matched_by_id: set[_File] = set()
+		for fileid, dst_file in dst_by_id.items():
+			src_file = src_by_id.get(fileid)
+			if src_file is None or dst_file is None:
+				continue
+			src_matched_by_id.add(src_file)
+			dst_matched_by_id.add(dst_file)
+			if src_file != dst_file:
+				rename_map[dst_file] = src_file
+
+		# Only metadata found on both sides can pair, so walk the smaller side and look up the other.
+		if len(dst_by_meta) <= len(src_by_meta):
+			pairs = ((meta, src_by_meta.get(meta), dst_file) for meta, dst_file in dst_by_meta.items())
+		else:
+			pairs = ((meta, src_file, dst_by_meta.get(meta)) for meta, src_file in src_by_meta.items())
+		for meta, src_file, dst_file in pairs:
+			if src_file is None or dst_file is None:
+				continue
+			if src_file == dst_file or src_file in src_matched_by_id or dst_file in dst_matched_by_id:
 				continue
 
-			assert src_file is not None
-			assert dst_file is not None
-
-			# Ignore if last 1kb do not match.
+			# Ignore if first or last 1kb do not match.
 			if not self.config.match_tail:
 				try:
-					if not _last_bytes(self.config.src / src_file) == _last_bytes(self.config.dst / dst_file):
+					if not _head_tail_eq(self.config.src / src_file, self.config.dst / dst_file, size=meta.size):
 						continue
 				except OSError as e:
 					self.config.logger.warning(_exc_summary(e))
@@ -210,8 +281,11 @@ class _Diff:
 
 			rename_map[dst_file] = src_file
 
-		# return rename_map
-		sorted_map = {k:rename_map[k] for k in sorted(rename_map.keys(), key=lambda x: x.norm)} # TODO this won't be needed if the pattern in get_dir_rename_map is copied here
+		# In low memory mode, this is called once per dir and there's rarely more than one rename, so don't sort or copy those.
+		if len(rename_map) < 2:
+			return rename_map
+		# sort the items directly so each key isn't looked up again
+		sorted_map = dict(sorted(rename_map.items(), key=lambda item: item[0].norm)) # TODO this won't be needed if the pattern in get_dir_rename_map is copied here
 		return sorted_map
 
 	def get_dir_rename_map(self, src_dir_hash: dict[_Dir, int], dst_dir_hash: dict[_Dir, int]) -> dict[_Dir, _Dir]:
@@ -219,20 +293,20 @@ class _Diff:
 
 		rename_map: dict[_Dir, _Dir] = {}
 
-		dst_meta_to_relpath = _reverse_dict({k:v for k,v in dst_dir_hash.items() if v is not None})
-		src_meta_to_relpath = _reverse_dict({k:v for k,v in src_dir_hash.items() if v is not None})
+		# Dirs with unknown hashes are reversed too (under the key None) rather than copying the dicts to drop them first.
+		# They are skipped below, so the None key is never looked up.
+		dst_meta_to_relpath = _reverse_dict(dst_dir_hash)
+		src_meta_to_relpath = _reverse_dict(src_dir_hash)
 
 		# Keys must be in bottom-up order, meaning child dirs comes before parent dirs.
 		# Don't edit other collections here, don't know which renames are valid.
 		for dst_dir in reversed(dst_dir_hash.keys()):
 			hash = dst_dir_hash[dst_dir]
-			if dst_meta_to_relpath[hash] is None:
-				continue
-			try:
-				src_dir = src_meta_to_relpath[hash]
-			except KeyError:
+			if hash is None or dst_meta_to_relpath[hash] is None:
 				continue
-			if src_dir is None: # or all(a==b for a,b in zip(dst_dir.norm, src_dir.norm)):
+			# most dst dirs have no src dir with the same hash, so don't raise and catch a KeyError for each
+			src_dir = src_meta_to_relpath.get(hash)
+			if src_dir is None: # missing or ambiguous # or all(a==b for a,b in zip(dst_dir.norm, src_dir.norm)):
 				continue
 			rename_map[dst_dir] = src_dir
 
@@ -255,6 +329,15 @@ class _Diff:
 		#self.config.logger.debug(f"{dst_dir_hash=}")
 		#self.config.logger.debug(f"{rename_map=}")
 
+		if not rename_map:
+			return [], set(), set()
+
+		# norms of entries that could block a rename, so checks are O(depth) instead of a scan over every entry
+		dst_only_file_norms = {f.norm for f in self.dst_only_files}
+		dst_only_dir_norms  = {d.norm for d in self.dst_only_dirs}
+		# rename_map keys by their parts, so a target's ancestors can be looked up by slicing instead of building a _Dir for each
+		rename_froms_by_real = {k.real: k for k in rename_map}
+
 		chains: list[dict[_Relpath, _Relpath]] = [] # valid, top-level rename chains
 		removed_by_rename: set[_Relpath] = set() # all entries removed by valid top level renames
 		created_by_rename: set[_Relpath] = set() # all entries created by valid top level renames
@@ -266,49 +349,43 @@ class _Diff:
 			if rename_from in removed_by_rename or rename_from in failed:
 				# Handled in a previous chain.
 				continue
-			if rename_from.parent in removed_by_rename:
+			# parent builds a new _Dir on each access, so only get it once
+			parent = rename_from.parent
+			if parent in removed_by_rename:
 				# Parent dir will be moved, so this dir will go with it.
 				removed_by_rename.add(rename_from)
-				created_by_rename.add(rename_map[rename_from])
+				created_by_rename.add(rename_to)
 				continue
-			if rename_from.parent in failed:
+			if parent in failed:
 				# Parent dir cannot be moved, so neither can this dir.
 				failed.add(rename_from)
 				continue
 
-			is_dir = type(rename_from) == _Dir
+			is_dir = isinstance(rename_from, _Dir)
+			# files are only blocked by dst-only files and dirs by dst-only dirs, so pick the set once instead of testing is_dir per link
+			blocker_norms = dst_only_dir_norms if is_dir else dst_only_file_norms
 			chain: dict[_Relpath, _Relpath] = {}
-			potential_remove = set()
-			potential_create = set()
 
 			# Get chain/cycle if it exists.
 			while True:
 				if not first:
 					first = rename_from
 				rename_to = rename_map[rename_from]
+				# Don't edit removed_by_rename or created_by_rename unless the chain is verified.
 				chain[rename_from] = rename_to
 
-				# Don't edit removed_by_rename or created_by_rename unless the chain is verified.
-				potential_remove.add(rename_from)
-				potential_create.add(rename_to)
+				rename_to_norm = rename_to.norm
 
-				if all(a==b for a,b in zip(rename_from.norm, rename_to.norm)):
+				if _in_lineage(rename_from.norm, rename_to_norm):
 					# They are equal or in a direct lineage.
 					# If allowed, a temp file may be needed and that's a headache.
 					#self.config.logger.debug(f"ignorng chain: {chain}")
 					failed.update(chain.keys())
 					chain = {}
 					break
-				if not is_dir and any(rename_to.is_relative_to(d) for d in self.dst_only_files):
-					# A file is blocking this rename.
-					# TODO The rename could go through if the blocking file is to be deleted.
-					#self.config.logger.debug(f"ignorng chain: {chain}")
-					failed.update(chain.keys())
-					chain = {}
-					break
-				if is_dir and any(rename_to.is_relative_to(d) for d in self.dst_only_dirs):
-					# A dir is blocking this rename.
-					# TODO The rename could go through if the blocking dir is to be deleted.
+				if _has_prefix_in(rename_to_norm, blocker_norms):
+					# A file or dir is blocking this rename.
+					# TODO The rename could go through if the blocking entry is to be deleted.
 					#self.config.logger.debug(f"ignorng chain: {chain}")
 					failed.update(chain.keys())
 					chain = {}
@@ -325,12 +402,12 @@ class _Diff:
 
 				# Find the highest level dir that contains rename_to.
 				top_dest_dir = rename_to
-				while True:
-					parent_dir = top_dest_dir.parent
-					if parent_dir in rename_map: # and parent_dir not in removed_by_rename:
-						top_dest_dir = parent_dir
-					else:
+				rename_to_real = rename_to.real
+				for i in range(len(rename_to_real) - 1, 0, -1):
+					parent_dir = rename_froms_by_real.get(rename_to_real[:i])
+					if parent_dir is None: # or parent_dir in removed_by_rename:
 						break
+					top_dest_dir = parent_dir
 
 				if is_dir and rename_to in self.src_only_dirs:
 					# Final link in the chain creates a new file.
@@ -346,8 +423,9 @@ class _Diff:
 
 			if chain:
 				chains.append(chain)
-				removed_by_rename.update(potential_remove)
-				for pc in potential_create:
+				# the chain's keys and values are the entries it removes and creates, so no separate sets are kept for them
+				removed_by_rename.update(chain.keys())
+				for pc in chain.values():
 					while pc:
 						prev_len = len(created_by_rename)
 						created_by_rename.add(pc)
@@ -355,6 +433,18 @@ class _Diff:
 						pc = pc.parent
 			first = None
 
+		# A moved dir takes all of its contents along, including entries that have no rename of their own (e.g., files whose metadata is shared with another file).
+		# Those entries need no create or delete, so they're marked as handled by the rename too.
+		moved_from_norms = {d.norm for chain in chains for d in chain if isinstance(d, _Dir)}
+		if moved_from_norms:
+			moved_to_norms = {d.norm for chain in chains for d in chain.values() if isinstance(d, _Dir)}
+			for entry in itertools.chain(self.dst_only_dirs, self.dst_only_files):
+				if _has_prefix_in(entry.norm[:-1], moved_from_norms):
+					removed_by_rename.add(entry)
+			for entry in itertools.chain(self.src_only_dirs, self.src_only_files):
+				if _has_prefix_in(entry.norm[:-1], moved_to_norms):
+					created_by_rename.add(entry)
+
 		#changed_by_rename = removed_by_rename.intersection(created_by_rename)
 		#removed_by_rename -= changed_by_rename
 		#created_by_rename -= changed_by_rename
@@ -363,21 +453,35 @@ class _Diff:
 	def update_other_sets(self, removed_by_rename: set[_Relpath], created_by_rename: set[_Relpath]):
 		'''Remove renamed files from other collections in this `_Diff`.'''
 
+		# Removals from the OrderedSets are collected and done once per set, since a single discard() can be O(n) for the ordered_set package.
+		removed_dirs  : set[_Relpath] = set()
+		removed_files : set[_Relpath] = set()
 		for rename_from in removed_by_rename:
-			if type(rename_from) == _Dir:
+			if isinstance(rename_from, _Dir):
 				self.dir_matches.pop(rename_from, None) # type: ignore [call-overload]
-				self.dst_only_dirs.discard(rename_from)
+				removed_dirs.add(rename_from)
 			else:
 				assert isinstance(rename_from, _File)
 				self.file_matches.pop(rename_from, None) # type: ignore [call-overload]
-				self.dst_only_files.discard(rename_from)
+				removed_files.add(rename_from)
 
+		created_dirs  : set[_Relpath] = set()
+		created_files : set[_Relpath] = set()
 		for rename_to in created_by_rename:
-			if type(rename_to) == _Dir:
-				self.src_only_dirs.discard(rename_to)
+			if isinstance(rename_to, _Dir):
+				created_dirs.add(rename_to)
 			else:
 				assert isinstance(rename_to, _File)
-				self.src_only_files.discard(rename_to)
+				created_files.add(rename_to)
+
+		for oset, entries in (
+			(self.dst_only_dirs, removed_dirs),
+			(self.dst_only_files, removed_files),
+			(self.src_only_dirs, created_dirs),
+			(self.src_only_files, created_files),
+		):
+			if oset and entries:
+				oset.difference_update(entries)
 
 	def get_rename_pairs(self, src_dir_hash = None, dst_dir_hash = None):
 		'''Convert rename map to a list of 'from', 'to' pairs, adding temp files where needed.'''
@@ -424,9 +528,26 @@ class _DualWalk:
 		self.dst_dir_hash : dict[_Dir, int] = {}
 		self._src_ancestors: set[str] = set()
 		self._dst_ancestors: set[str] = set()
+		self._executor: ThreadPoolExecutor|None = None # lists src and dst dirs concurrently during iteration, if either root is remote and they don't share a connection
+		# File IDs are only used to pair renames, and two entries can only be the same file if they're on the same device.
+		self._get_file_ids = config.renames and _same_device(config.src, config.dst)
 
 	def __iter__(self):
-		yield from self.dual_walk(self.config.src, self.config.dst)
+		src, dst = self.config.src, self.config.dst
+		src_remote = isinstance(src, RemotePath)
+		dst_remote = isinstance(dst, RemotePath)
+		# SFTP connections are shared per netloc, and a paramiko SFTPClient can't serve concurrent requests,
+		# so only list the two roots concurrently when they don't share a connection
+		if (src_remote != dst_remote) or (src_remote and dst_remote and src.netloc != dst.netloc): # type: ignore [union-attr]
+			# listing a remote dir is mostly spent waiting on the network, so the other root can be listed in the meantime
+			with ThreadPoolExecutor(max_workers=2) as executor:
+				self._executor = executor
+				try:
+					yield from self.dual_walk(self.config.src, self.config.dst)
+				finally:
+					self._executor = None
+		else:
+			yield from self.dual_walk(self.config.src, self.config.dst)
 
 	def dual_walk(self, src_path: _AbstractPath|None, dst_path: _AbstractPath|None, *, _bottom_up: bool=False) -> Iterator[_Diff]:
 		'''
@@ -450,29 +571,38 @@ class _DualWalk:
 					return
 				self._dst_ancestors.add(dst_true_path)
 
-		self.config.logger.debug(f"scanning src: {src_path}")
-		self.config.logger.debug(f"scanning dst: {dst_path}")
+		# checked once per dir, so the f-strings below aren't built when DEBUG is off
+		debug = self.config.logger.isEnabledFor(logging.DEBUG)
+		if debug:
+			self.config.logger.debug(f"scanning src: {src_path}")
+			self.config.logger.debug(f"scanning dst: {dst_path}")
 
 		# if src_path or dst_path is None, an empty dir_list is returned, instead of None or an exception
 		# this lets us still find the diff of every dir even when a corresponding dir doesn't exist
+		src_future: Future[_DirList]|None = None
+		dst_future: Future[_DirList]|None = None
+		if self._executor is not None and src_path is not None and dst_path is not None:
+			src_future = self._executor.submit(self.dir_list, src_path, self.config.src)
+			dst_future = self._executor.submit(self.dir_list, dst_path, self.config.dst)
 		try:
-			src_list = self.dir_list(src_path, self.config.src)
+			src_list = src_future.result() if src_future else self.dir_list(src_path, self.config.src)
 		except OSError as e:
 			# no read access
 			# TODO tally_failure in Results, would need to do so without an Operation to pass
 			self.config.logger.error(_exc_summary(e))
 			return
 		try:
-			dst_list = self.dir_list(dst_path, self.config.dst)
+			dst_list = dst_future.result() if dst_future else self.dir_list(dst_path, self.config.dst)
 		except OSError as e:
 			self.config.logger.error(_exc_summary(e))
 			return
 
-		src_parent_dir, src_dirs, src_files, src_dir_size, src_file_metadata, src_nonstandard = src_list
-		dst_parent_dir, dst_dirs, dst_files, dst_dir_size, dst_file_metadata, dst_nonstandard = dst_list
+		src_parent_dir, src_dirs, src_files, src_dir_size, src_file_metadata, src_file_ids, src_nonstandard = src_list
+		dst_parent_dir, dst_dirs, dst_files, dst_dir_size, dst_file_metadata, dst_file_ids, dst_nonstandard = dst_list
 		
-		self.config.logger.debug(f"{src_dir_size=}")
-		self.config.logger.debug(f"{dst_dir_size=}")
+		if debug:
+			self.config.logger.debug(f"{src_dir_size=}")
+			self.config.logger.debug(f"{dst_dir_size=}")
 
 		if src_parent_dir:
 			self.src_dir_sizes[src_parent_dir] = src_dir_size
@@ -511,29 +641,17 @@ class _DualWalk:
 		if self.get_dir_hashes:
 			# get directory hashes, used for finding renamed directories
 			# no entry means the dir has unknown hash due to items filtered out
-			# TODO look into hash functions that 1. accept iterators, 2. are permutation invariant
-			files: list[Any]
 			if src_parent_dir is not None:
-				if len(src_files) + len(src_dirs) == src_dir_size:
-					try:
-						if all(metadata.size >= self.config.rename_threshold for metadata in src_file_metadata.values()):
-							dirs = [self.src_dir_hash[d] for d in src_dirs] # raises KeyError
-							files = sorted((k.name,v) for k,v in src_file_metadata.items())
-							self.src_dir_hash[src_parent_dir] = hash(tuple(files + dirs))
-					except KeyError:
-						# hash unknown for some subdir, so it's unknown for this dir too
-						pass
+				# if the hash is unknown for some subdir, it's unknown for this dir too, so check that before scanning the files
+				if len(src_files) + len(src_dirs) == src_dir_size and all(d in self.src_dir_hash for d in src_dirs):
+					if all(metadata.size >= self.config.rename_threshold for metadata in src_file_metadata.values()):
+						self.src_dir_hash[src_parent_dir] = _dir_hash(src_file_metadata, src_dirs, self.src_dir_hash)
 
 			if dst_parent_dir is not None:
-				if len(dst_files) + len(dst_dirs) == dst_dir_size:
-					try:
-						if all(metadata.size >= self.config.rename_threshold for metadata in src_file_metadata.values()):
-							dirs = [self.dst_dir_hash[d] for d in dst_dirs] # raises KeyError
-							files = sorted((k.name,v) for k,v in dst_file_metadata.items())
-							self.dst_dir_hash[dst_parent_dir] = hash(tuple(files + dirs))
-					except KeyError:
-						# hash unknown for some subdir, so it's unknown for this dir too
-						pass
+				# if the hash is unknown for some subdir, it's unknown for this dir too, so check that before scanning the files
+				if len(dst_files) + len(dst_dirs) == dst_dir_size and all(d in self.dst_dir_hash for d in dst_dirs):
+					if all(metadata.size >= self.config.rename_threshold for metadata in dst_file_metadata.values()):
+						self.dst_dir_hash[dst_parent_dir] = _dir_hash(dst_file_metadata, dst_dirs, self.dst_dir_hash)
 
 		if self.config.follow_symlinks:
 			if src_path is not None:
@@ -549,6 +667,7 @@ class _DualWalk:
 		files             : list[_File] = []
 		dir_size          : int = 0
 		file_metadata     : dict[_File, _Metadata] = {}
+		file_ids          : dict[_File, tuple[int, int]] = {}
 		nonstandard_files : list[_File] = []
 
 		try:
@@ -567,6 +686,7 @@ class _DualWalk:
 				files             = files,
 				dir_size          = dir_size,
 				file_metadata     = file_metadata,
+				file_ids          = file_ids,
 				nonstandard_files = nonstandard_files,
 			)
 
@@ -595,27 +715,42 @@ class _DualWalk:
 					file_entries.append(entry)
 
 		# ensure entries are sorted
-		dir_entries.sort(key = lambda x: x.name)
-		file_entries.sort(key = lambda x: x.name)
+		dir_entries.sort(key = attrgetter("name"))
+		file_entries.sort(key = attrgetter("name"))
 
-		filter = self.config.filter.filter
+		# a catch-all filter (e.g., the default "+ **/*") cannot reject anything, so skip calling it per entry
+		filter = None if self.config.filter.matches_all() else self.config.filter.filter
 		sep = "/" if isinstance(root, RemotePath) else os.sep
+		# config fields read for every entry
+		dst_sep         = self.config.dst_sep
+		dst_sys         = self.config.dst_sys
+		follow_symlinks = self.config.follow_symlinks
+		sftp_compat     = self.config.sftp_compat
+		get_file_ids    = self._get_file_ids
 		root_name = (root.name + sep) if self.config._show_root_names else ""
 
+		# entry relpaths are built by string concatenation, so the path arithmetic is only done once per dir
+		parent_relpath = str(dir.relative_to(root))
+		parent_dir = _Dir(
+			relpath = parent_relpath,
+			sep     = sep,
+			dst_sys = dst_sys,
+		)
+		prefix = "" if parent_relpath == "." else parent_relpath + sep
+
 		# prune dirs
 		for entry in dir_entries:
-			dirname = entry.name
-			dir_path = dir / dirname
-			dir_relpath = str(dir_path.relative_to(root))
+			dir_relpath = prefix + entry.name
 
-			if not filter(dir_relpath + self.config.dst_sep, root=root):
+			if filter and not filter(dir_relpath + dst_sep, root=root):
 				continue
 
 			try:
 				d = _Dir(
 					relpath = dir_relpath,
 					sep = sep,
-					dst_sys = self.config.dst_sys,
+					dst_sys = dst_sys,
+					parent_dir = parent_dir,
 				)
 			except IncompatiblePathError:
 				self.config.logger.warning(f"Ignoring incompatible dir: {root_name}{dir_relpath}{sep}")
@@ -626,7 +761,7 @@ class _DualWalk:
 		# prune files
 		for entry in file_entries:
 			# Ignore non-standard files (e.g., sockets, named pipes, block & character devices), but allow symlinks.
-			if self.config.follow_symlinks:
+			if follow_symlinks:
 				if not entry.is_file(follow_symlinks=True):
 					nonstandard_entries.append(entry)
 					continue
@@ -635,76 +770,74 @@ class _DualWalk:
 					nonstandard_entries.append(entry)
 					continue
 
-			filename = entry.name
-			file_path = dir / filename
-			file_relpath = str(file_path.relative_to(root))
+			file_relpath = prefix + entry.name
 
-			if not filter(file_relpath, root=root):
+			if filter and not filter(file_relpath, root=root):
 				continue
 
 			try:
 				f = _File(
 					relpath = file_relpath,
 					sep = sep,
-					dst_sys = self.config.dst_sys,
+					dst_sys = dst_sys,
+					parent_dir = parent_dir,
 				)
 			except IncompatiblePathError as e:
 				self.config.logger.warning(f"Ignoring incompatible file: {root_name}{file_relpath}")
 				continue
 
-			stat  = entry.stat(follow_symlinks=self.config.follow_symlinks)
+			stat  = entry.stat(follow_symlinks=follow_symlinks)
 			size  = stat.st_size
 			mtime = stat.st_mtime
 			if size is None or mtime is None:
 				self.config.logger.warning(f"Ignoring file with unknown metadata: {root_name}{file_relpath}")
 				continue
 
-			if self.config.sftp_compat:
+			if sftp_compat:
 				mtime = float(int(mtime))
 
 			files.append(f)
-			file_metadata[f] = _Metadata(size=size, mtime=mtime)
+			file_metadata[f] = _Metadata(size, mtime)
+
+			if get_file_ids:
+				# st_ino is 0 for entries from os.scandir on Windows
+				inode = stat.st_ino
+				if inode:
+					file_ids[f] = (stat.st_dev, inode)
 
 		for entry in nonstandard_entries:
-			filename = entry.name
-			file_path = dir / filename
-			file_relpath = str(file_path.relative_to(root))
+			file_relpath = prefix + entry.name
 
-			if not filter(file_relpath, root=root):
+			if filter and not filter(file_relpath, root=root):
 				continue
 
 			try:
 				f = _File(
 					relpath = file_relpath,
 					sep = sep,
-					dst_sys = self.config.dst_sys,
+					dst_sys = dst_sys,
+					parent_dir = parent_dir,
 				)
 			except IncompatiblePathError as e:
 				continue
 
 			nonstandard_files.append(f)
 
-		parent_relpath = str(dir.relative_to(root))
-		parent_dir = _Dir(
-			relpath = parent_relpath,
-			sep     = sep,
-			dst_sys = self.config.dst_sys,
-		)
-
 		return _DirList(
 			parent_dir        = parent_dir,
 			dirs              = dirs,
 			files             = files,
 			dir_size          = dir_size,
 			file_metadata     = file_metadata,
+			file_ids          = file_ids,
 			nonstandard_files = nonstandard_files,
 		)
 
 	def dir_diff(self, src_list: _DirList, dst_list: _DirList) -> _Diff:
 		'''Returns a tuple of the differences between of two directories.'''
 
-		src_parent, src_dirs, src_files, src_dir_size, src_file_metadata, src_nonstandard = src_list
-		dst_parent, dst_dirs, dst_files, dst_dir_size, dst_file_metadata, dst_nonstandard = dst_list
+		src_parent, src_dirs, src_files, src_dir_size, src_file_metadata, src_file_ids, src_nonstandard = src_list
+		dst_parent, dst_dirs, dst_files, dst_dir_size, dst_file_metadata, dst_file_ids, dst_nonstandard = dst_list
 
 		src_only_dirs : OrderedSet[_Dir]   = OrderedSet()
 		dst_only_dirs : OrderedSet[_Dir]   = OrderedSet()
@@ -714,8 +847,8 @@ class _DualWalk:
 		file_matches  : dict[_File, _File] = {}
 		# ignore entries that are ambiguous or in conflict with another entry
 		# ignored entries won't be considered as rename candidates
-		ignored_src_entries: OrderedSet[_Relpath] = OrderedSet()
-		ignored_dst_entries: OrderedSet[_Relpath] = OrderedSet() # dst entries that are only matched with ignored entries
+		ignored_src_entries: set[str] = set() # relpaths
+		ignored_dst_entries: set[str] = set() # relpaths of dst entries that are only matched with ignored entries
 
 
 		#if dst_parent is None:
@@ -741,46 +874,58 @@ class _DualWalk:
 		# A weak match will be be chosen if there is only one and there is no strong match.
 		# If there is no chosen match, then the file is ignored, along with all weak matches to it.
 
-		in_dst: dict[_Normalized, list[_Normalized]] = {}
-		in_src_only: dict[_Normalized, list[_Normalized]] = {}
+		# Entries are keyed by their normalized name, which is unique here since src_parent and dst_parent have the same norm.
+		# The name properties are read through norm and real directly in this method, since they are looked up for every entry.
+		in_dst: dict[str, _Relpath] = {e.norm[-1]: e for e in itertools.chain(dst_dirs, dst_files)}
+		# Src entries are bucketed the same way in a single pass. Only src roots that are case-sensitive, unlike dst, can have more than one entry per name.
+		# Those extra entries are kept in src_dupes, so no list is made for every other name.
+		in_src: dict[str, _Relpath] = {}
+		src_dupes: dict[str, list[_Relpath]] = {}
 
-		for d in dst_dirs:
-			in_dst[_Normalized(d)] = []
-		for f in dst_files:
-			in_dst[_Normalized(f)] = []
-
-		for d in src_dirs:
-			try:
-				in_dst[_Normalized(d)].append(_Normalized(d))
-			except KeyError:
-				try:
-					in_src_only[_Normalized(d)].append(_Normalized(d))
-				except KeyError:
-					in_src_only[_Normalized(d)] = [_Normalized(d)]
-		for f in src_files:
-			try:
-				in_dst[_Normalized(f)].append(_Normalized(f))
-			except KeyError:
-				try:
-					in_src_only[_Normalized(f)].append(_Normalized(f))
-				except KeyError:
-					in_src_only[_Normalized(f)] = [_Normalized(f)]
+		for e in itertools.chain(src_dirs, src_files):
+			name = e.norm[-1]
+			first = in_src.setdefault(name, e)
+			if first is not e:
+				src_dupes.setdefault(name, [first]).append(e)
 
 		# don't try to match with a nonstandard file (socket, named pipe, etc)
 		for f in src_nonstandard:
-			in_dst.pop(_Normalized(f), None)
+			name = f.norm[-1]
+			if in_dst.pop(name, None) is not None:
+				# the src entries the dst entry would have matched are left out too
+				in_src.pop(name, None)
+				src_dupes.pop(name, None)
 		for f in dst_nonstandard:
-			in_src_only.pop(_Normalized(f), None)
+			name = f.norm[-1]
+			in_src.pop(name, None)
+			src_dupes.pop(name, None)
+
+		for name, dst_entry in in_dst.items():
+			# what's left in in_src afterwards has no dst entry
+			match = in_src.pop(name, None)
+			# Fast paths for the common cases: no src entry, or a single src entry of the same type and exact same name.
+			if match is None:
+				if isinstance(dst_entry, _Dir):
+					dst_only_dirs.add(dst_entry)
+				else:
+					dst_only_files.add(dst_entry)
+				continue
+			matches = src_dupes.get(name)
+			if matches is None:
+				if type(match) is type(dst_entry) and match.real[-1] == dst_entry.real[-1]:
+					if isinstance(match, _Dir):
+						dir_matches[match] = dst_entry
+					else:
+						file_matches[match] = dst_entry
+					continue
+				matches = [match]
 
-		for dst_normalized, matches in in_dst.items():
-			dst_entry = dst_normalized.unwrapped
 			strong_match: _Relpath|None = None
 			weak_match: _Relpath|bool|None = None
 			do_reject_dst = False
 			rejected_src: list[_Relpath] = []
-			for match_normalized in matches:
-				match = match_normalized.unwrapped
-				if type(dst_entry) != type(match) and not self.config.force_replace:
+			for match in matches:
+				if type(dst_entry) is not type(match) and not self.config.force_replace:
 					do_reject_dst = True
 					break
 				elif dst_entry.name == match.name:
@@ -804,59 +949,57 @@ class _DualWalk:
 			if weak_match is False and strong_match is None:
 				do_reject_dst = True
 			if do_reject_dst:
-				rejected_src = [m.unwrapped for m in matches]
+				rejected_src = list(matches)
 			for s in rejected_src:
-				if type(s) == _Dir:
+				if isinstance(s, _Dir):
 					self.config.logger.warning(f"Ignoring conflicting dir: {self.config.src_name}{s}{self.config.src_sep}")
 				else:
 					self.config.logger.warning(f"Ignoring conflicting file: {self.config.src_name}{s}")
-				ignored_src_entries.add(s)
+				ignored_src_entries.add(s.relpath)
 			if do_reject_dst:
-				if type(dst_entry) == _Dir:
+				if isinstance(dst_entry, _Dir):
 					self.config.logger.warning(f"Ignoring unmatched dir: {self.config.dst_name}{dst_entry}{self.config.dst_sep}")
 				else:
 					self.config.logger.warning(f"Ignoring unmatched file: {self.config.dst_name}{dst_entry}")
-				ignored_dst_entries.add(dst_entry)
+				ignored_dst_entries.add(dst_entry.relpath)
 
 			final_match = strong_match or weak_match
 			if final_match:
-				if type(final_match) == _Dir and type(dst_entry) == _Dir:
+				if isinstance(final_match, _Dir) and isinstance(dst_entry, _Dir):
 					dir_matches[final_match] = dst_entry
-				elif type(final_match) != _Dir and type(dst_entry) != _Dir:
+				elif not isinstance(final_match, _Dir) and not isinstance(dst_entry, _Dir):
 					assert isinstance(final_match, _File)
 					assert isinstance(dst_entry, _File)
 					file_matches[final_match] = dst_entry
-				elif type(final_match) != _Dir and type(dst_entry) == _Dir:
+				elif not isinstance(final_match, _Dir) and isinstance(dst_entry, _Dir):
 					assert isinstance(final_match, _File)
-					assert type(dst_entry) == _Dir
+					assert isinstance(dst_entry, _Dir)
 					src_only_files.add(final_match)
 					dst_only_dirs.add(dst_entry)
 				else:
-					assert type(final_match) == _Dir
+					assert isinstance(final_match, _Dir)
 					assert isinstance(dst_entry, _File)
 					src_only_dirs.add(final_match)
 					dst_only_files.add(dst_entry)
 
 			elif not do_reject_dst:
-				if type(dst_entry) == _Dir:
+				if isinstance(dst_entry, _Dir):
 					dst_only_dirs.add(dst_entry)
 				else:
 					assert isinstance(dst_entry, _File)
 					dst_only_files.add(dst_entry)
 
-		for src_normalized, matches in in_src_only.items():
-			src_entry = src_normalized.unwrapped
-			if len(matches) > 1:
-				for m_normalized in matches:
-					m = m_normalized.unwrapped
-					if type(m) == _Dir:
+		for name, src_entry in in_src.items():
+			matches = src_dupes.get(name)
+			if matches is not None:
+				for m in matches:
+					if isinstance(m, _Dir):
 						self.config.logger.warning(f"Ignoring ambiguous dir: {self.config.src_name}{m}{self.config.src_sep}")
 					else:
 						self.config.logger.warning(f"Ignoring ambiguous file: {self.config.src_name}{m}")
-					ignored_src_entries.add(m)
+					ignored_src_entries.add(m.relpath)
 			else:
-				m = matches[0].unwrapped
-				if type(src_entry) == _Dir:
+				if isinstance(src_entry, _Dir):
 					src_only_dirs.add(src_entry)
 				else:
 					assert isinstance(src_entry, _File)
@@ -868,6 +1011,8 @@ class _DualWalk:
 			dst_parent = None if dst_parent is None else dst_parent,
 			src_file_metadata   = src_file_metadata,
 			dst_file_metadata   = dst_file_metadata,
+			src_file_ids        = src_file_ids,
+			dst_file_ids        = dst_file_ids,
 			src_only_dirs       = src_only_dirs,
 			dst_only_dirs       = dst_only_dirs,
 			src_only_files      = src_only_files,
@@ -880,13 +1025,60 @@ class _DualWalk:
 		# self.config.logger.debug(diff)
 		return diff
 
-def _last_bytes(file:_AbstractPath, n:int = 1024) -> bytes:
-	'''Reads and returns the last `n` bytes of a file. Used in conjunction with a metadata comparison to quickly check that two files are likely the same.'''
+def _in_lineage(a:tuple[str, ...], b:tuple[str, ...]) -> bool:
+	'''Returns `True` if one of the norms `a` and `b` is equal to, or a leading part of, the other. Same as `all(x==y for x,y in zip(a, b))`, but compares in C.'''
 
-	file_size = file.stat().st_size
-	if file_size is None:
-		raise PermissionError(1, "Could not get file size", str(file))
-	bytes_to_read = file_size if n > file_size else n
-	with file.open("rb") as f:
-		f.seek(-bytes_to_read, os.SEEK_END)
-		return f.read()
+	if len(a) >= len(b):
+		return a[:len(b)] == b
+	return b[:len(a)] == a
+
+def _has_prefix_in(norm:tuple[str, ...], prefixes:set[tuple[str, ...]]) -> bool:
+	'''Returns `True` if `norm`, or any of its leading parts, is in `prefixes`. Equivalent to checking `is_relative_to()` against each `_Relpath` whose norm is in `prefixes`.'''
+
+	# Each slice is a new tuple whose hash has to be computed, so don't make any when there's nothing to find.
+	# This is the common case, since most renames have no dst-only entries in the way.
+	if not prefixes:
+		return False
+	return any(norm[:i] in prefixes for i in range(1, len(norm) + 1))
+
+def _same_device(a:_AbstractPath, b:_AbstractPath) -> bool:
+	'''Returns `True` if `a` and `b` are both local paths on the same device.'''
+
+	if not isinstance(a, Path) or not isinstance(b, Path):
+		return False
+	try:
+		return a.stat().st_dev == b.stat().st_dev
+	except OSError:
+		# e.g., dst doesn't exist yet, so nothing in it can be renamed
+		return False
+
+def _dir_hash(file_metadata:dict[_File, _Metadata], dirs:list[_Dir], dir_hashes:dict[_Dir, int]) -> int:
+	'''Returns a hash of a dir's contents, given its files' metadata and its subdirs' hashes. Raises a `KeyError` if a subdir's hash is unknown.'''
+
+	# XOR is permutation invariant, so entries don't need to be sorted first.
+	# Names within a dir are unique, so no two entries can cancel each other out.
+	h = 0
+	for file, metadata in file_metadata.items():
+		h ^= hash((file.name, metadata))
+	for d in dirs:
+		h ^= hash((d.name, dir_hashes[d]))
+	return h
+
+def _head_tail_eq(a:_AbstractPath, b:_AbstractPath, n:int = 1024, *, size:int|None = None) -> bool:
+	'''Returns `True` if files `a` and `b` have the same first and last `n` bytes. Used in conjunction with a metadata comparison to quickly check that two files are likely the same. Pass the files' `size`, if already known, to avoid a stat call.'''
+
+	if size is None:
+		size = a.stat().st_size
+		if size is None:
+			raise PermissionError(1, "Could not get file size", str(a))
+	# unbuffered, so only the compared bytes are read instead of a full buffer at each position
+	with a.open("rb", buffering=0) as fa, b.open("rb", buffering=0) as fb:
+		# the head is compared first since it's already under the read position
+		if fa.read(n) != fb.read(n):
+			return False
+		if size <= n:
+			return True
+		tail_start = max(size - n, n) # don't re-read bytes compared in the head
+		fa.seek(tail_start)
+		fb.seek(tail_start)
+		return fa.read(n) == fb.read(n)
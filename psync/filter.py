@@ -5,6 +5,7 @@ import os
 import sys
 import re
 import glob
+from functools import lru_cache
 from dataclasses import dataclass
 from collections import namedtuple
 
@@ -12,6 +13,16 @@ from .types import _AbstractPath
 from .errors import StateError
 from .log import logger
 
+_UNCACHED = object()
+_GLOB_CHARS = frozenset("*?[")
+
+@lru_cache(maxsize=4096)
+def _compile_glob(glob_pattern:str, include_hidden:bool, ignore_case:bool) -> re.Pattern:
+	'''Compile a glob string into a regex. Cached, since implicit parent directories repeat across patterns and filters.'''
+
+	regex = glob.translate(glob_pattern, recursive=True, include_hidden=include_hidden)
+	return re.compile(regex, flags=re.IGNORECASE if ignore_case else 0)
+
 class Filter:
 	'''Abstract base class for all file filtering objects supplied to `Sync`.'''
 
@@ -25,6 +36,11 @@ class Filter:
 
 		raise NotImplementedError()
 
+	def matches_all(self) -> bool:
+		'''Whether this `Filter` is known to allow every path, letting callers skip calling `filter()`. Returns `False` unless a subclass can prove otherwise.'''
+
+		return False
+
 class PathFilter(Filter):
 	'''Filter that allows or rejects based on file path string.'''
 
@@ -33,7 +49,19 @@ class PathFilter(Filter):
 	else:
 		seps = "/"
 
-	@dataclass
+	# regexes used by _parse_pattern(), compiled once
+	_leading_seps_re  = re.compile(rf"^([{seps}](?![*?[]))|([{seps}]{{2,}})")
+	_dot_segment_re   = re.compile(rf"^\.\.?[{seps}]|[{seps}]\.\.?[{seps}]|[{seps}]\.\.?$")
+	_repeated_seps_re = re.compile(rf"[{seps}]+")
+
+	_max_results = 65536 # filter() results kept before starting over
+
+	# regexes of the catch-all globs, used by matches_all()
+	_match_all       = glob.translate("**",   recursive=True, include_hidden=True)
+	_match_all_files = glob.translate("**/*", recursive=True, include_hidden=True)
+	_match_all_dirs  = glob.translate("**/",  recursive=True, include_hidden=True)
+
+	@dataclass(slots=True)
 	class _Segment:
 		'''The building blocks of a `PathFilter`, built from a pattern string and action. Each file path will be compared to a list of these, and the first one that matches will decide whether the file is allowed or rejected.'''
 
@@ -61,11 +89,10 @@ class PathFilter(Filter):
 
 		if "\0" in s:
 			raise ValueError("Invalid null character in filter string")
-		s += "\0"
 
 		for i, char in enumerate(s):
 
-			if char.strip() == "":
+			if char.isspace():
 				if escape:
 					if d_quotes:
 						# mimic bash, treat backslash literally
@@ -85,22 +112,6 @@ class PathFilter(Filter):
 						yield token
 					token = ""
 					tokstart = i+1
-			elif char == "\0":
-				if escape:
-					raise ValueError("Unterminated escape sequence in filter string")
-				elif s_quotes:
-					raise ValueError("Unclosed quotes in filter string")
-				elif d_quotes:
-					raise ValueError("Unclosed quotes in filter string")
-				elif token:
-					if token == "+":
-						yield True if i == tokstart+1 else "+"
-					elif token == "-":
-						yield False if i == tokstart+1 else "-"
-					else:
-						yield token
-					token = ""
-					tokstart = i+1
 			elif char == "\\":
 				if escape:
 					token += "\\"
@@ -109,7 +120,7 @@ class PathFilter(Filter):
 					token += "\\"
 				else:
 					escape = True
-			elif char in ["*", "?", "["]:
+			elif char in _GLOB_CHARS:
 				if escape:
 					if is_glob:
 						if glob_is_escaped:
@@ -156,6 +167,21 @@ class PathFilter(Filter):
 					escape = False
 				token += char
 
+		# end of string
+		if escape:
+			raise ValueError("Unterminated escape sequence in filter string")
+		elif s_quotes:
+			raise ValueError("Unclosed quotes in filter string")
+		elif d_quotes:
+			raise ValueError("Unclosed quotes in filter string")
+		elif token:
+			if token == "+":
+				yield True if len(s) == tokstart+1 else "+"
+			elif token == "-":
+				yield False if len(s) == tokstart+1 else "-"
+			else:
+				yield token
+
 	@classmethod
 	def _parse_pattern(cls, action:bool, pattern:str, *, ignore_hidden:bool, ignore_case:bool, is_glob:bool, glob_is_escaped:bool, is_dir:bool|None):
 		'''Create a new `Segment` from the pattern string.'''
@@ -165,7 +191,7 @@ class PathFilter(Filter):
 			is_relative = True
 			if glob_is_escaped:
 				# consider anything other than a single backslash next to a glob char to be repeated path separators
-				pattern = re.sub(rf"^([{PathFilter.seps}](?![*?[]))|([{PathFilter.seps}]{{2,}})", "", pattern[2:])
+				pattern = PathFilter._leading_seps_re.sub("", pattern[2:])
 			else:
 				pattern = pattern[2:].lstrip(PathFilter.seps)
 		if pattern:
@@ -177,10 +203,10 @@ class PathFilter(Filter):
 			# unescape glob chars
 			glob_pattern = PathFilter._convert_to_glob_string(pattern, is_glob=is_glob, glob_is_escaped=glob_is_escaped)
 			# don't allow . or .. segments
-			if glob_pattern == ".." or re.search(rf"^\.\.?[{PathFilter.seps}]", glob_pattern) or re.search(rf"[{PathFilter.seps}]\.\.?[{PathFilter.seps}]", glob_pattern) or re.search(rf"[{PathFilter.seps}]\.\.?$", glob_pattern):
+			if glob_pattern == ".." or PathFilter._dot_segment_re.search(glob_pattern):
 				raise ValueError(f". and .. path references are not supported (except for paths starting with ./): {pattern}")
 			# collapse repeated slashes
-			glob_pattern = re.sub(rf"[{PathFilter.seps}]+", "/", glob_pattern)
+			glob_pattern = PathFilter._repeated_seps_re.sub("/", glob_pattern)
 			# don't allow absolute paths
 			if os.path.isabs(glob_pattern) or glob_pattern[0] in PathFilter.seps:
 				# just assume anything starting with a path separator is an absolute path
@@ -193,8 +219,7 @@ class PathFilter(Filter):
 				elif not is_dir and count%2:
 					glob_pattern = glob_pattern[:-1]
 			# convert to regex
-			regex = glob.translate(glob_pattern, recursive=True, include_hidden=(not ignore_hidden))
-			matcher = re.compile(regex, flags=re.IGNORECASE if ignore_case else 0)
+			matcher = _compile_glob(glob_pattern, not ignore_hidden, ignore_case)
 			return PathFilter._Segment(glob_pattern=glob_pattern, action=action, matcher=matcher, is_relative=is_relative, is_implicit=False)
 		else:
 			return None
@@ -205,31 +230,34 @@ class PathFilter(Filter):
 
 		if not is_glob and glob_is_escaped:
 			raise ValueError(f"Incompatible arguments: is_glob==False, glob_is_escaped==True")
-		glob_string = ""
+		if "\\" not in pattern:
+			# every character would be copied as is
+			return pattern
+		parts : list[str] = []
 		escape = False
 		for c in pattern:
 			if c == "\\":
 				if glob_is_escaped:
 					if escape:
-						glob_string += "\\"
+						parts.append("\\")
 						escape = False
 					else:
 						escape = True
 				else:
-					glob_string += "\\"
-			elif is_glob and c in ["*", "?", "["]:
+					parts.append("\\")
+			elif is_glob and c in _GLOB_CHARS:
 				if escape:
-					glob_string += glob.translate(c)
+					parts.append(glob.translate(c))
 				else:
-					glob_string += c
+					parts.append(c)
 			else:
 				if escape:
-					glob_string += "\\"
+					parts.append("\\")
 					escape = False
-				glob_string += c
+				parts.append(c)
 		if escape:
-			glob_string += "\\"
-		return glob_string
+			parts.append("\\")
+		return "".join(parts)
 
 	def __init__(self, filter_string:str = "**", *, ignore_hidden:bool = False, ignore_case:bool = (os.name=="nt"), is_glob:bool = True, glob_is_escaped:bool = False, default:bool = False):
 		'''
@@ -252,7 +280,10 @@ class PathFilter(Filter):
 		self.default         = default
 
 		self._segments : list[PathFilter._Segment] = []
+		self._results  : dict[str, bool|None] = {} # action of the first matching segment, by relpath; src and dst entries of matched dirs share relpaths
+		self._combined : tuple[re.Pattern, re.Pattern, list[bool]]|None = None # built on first use by _combine()
 		self._tmp_allowed : set[str] = set() # directories implied when allowing an entry with multiple path segments
+		self._allow_dirs  : list[PathFilter._Segment] = [] # explicit allow segments for directories since the last reject segment, which relative patterns are appended to
 
 		self._validated : bool = False
 
@@ -281,6 +312,10 @@ class PathFilter(Filter):
 			):
 				self._tmp_allowed.add(segment.glob_pattern)
 				self._segments.append(segment)
+				if not segment.is_implicit and segment.glob_pattern.endswith("/"):
+					self._allow_dirs.append(segment)
+		self._results.clear()
+		self._combined = None
 		return self
 
 	def reject(self, *patterns, ignore_hidden:bool|None = None, ignore_case:bool|None = None, is_glob:bool|None = None, glob_is_escaped:bool|None = None, is_dir:bool|None = None) -> "PathFilter":
@@ -296,6 +331,9 @@ class PathFilter(Filter):
 				is_dir = is_dir,
 			):
 				self._segments.append(segment)
+				self._allow_dirs.clear()
+		self._results.clear()
+		self._combined = None
 		return self
 
 	def _get_segments(self, action:bool, pattern:str, *, ignore_hidden:bool, ignore_case:bool, is_glob:bool, glob_is_escaped:bool, is_dir:bool|None):
@@ -336,21 +374,18 @@ class PathFilter(Filter):
 				# Combine relative segment with parent dirs.
 				# If there are no parent dirs then assume relative to root dir. Don't throw away the segment.
 				segment_handled = False
-				for parent in reversed(self._segments):
-					if not parent.action:
-						break
-					if not parent.is_implicit and parent.glob_pattern.endswith("/"):
-						segment_handled = True
-						pattern = parent.glob_pattern + segment.glob_pattern
-						for new_segment in self._get_segments(True, pattern,
-							ignore_hidden = ignore_hidden,
-							ignore_case = ignore_case,
-							is_glob = True,
-							glob_is_escaped = False,
-							is_dir = is_dir,
-						):
-							new_segment.is_implicit = True
-							yield new_segment
+				for parent in reversed(self._allow_dirs):
+					segment_handled = True
+					pattern = parent.glob_pattern + segment.glob_pattern
+					for new_segment in self._get_segments(True, pattern,
+						ignore_hidden = ignore_hidden,
+						ignore_case = ignore_case,
+						is_glob = True,
+						glob_is_escaped = False,
+						is_dir = is_dir,
+					):
+						new_segment.is_implicit = True
+						yield new_segment
 				if not segment_handled:
 					segment.is_implicit = True
 					yield segment
@@ -363,10 +398,57 @@ class PathFilter(Filter):
 			if not any(segment.action for segment in self._segments):
 				logger.warning("Filter only has reject patterns. It will never match anything.")
 
+		# The result doesn't depend on root, so the dst entry of a matched pair reuses the src entry's result.
+		action = self._results.get(relpath, _UNCACHED)
+		if action is _UNCACHED:
+			# read once, so a concurrent allow()/reject() or _combine() can't mix patterns and actions from different builds
+			combined = self._combined
+			if combined is None:
+				combined = self._combine()
+			dirs_pattern, files_pattern, actions = combined
+			m = (dirs_pattern if relpath[-1:] in PathFilter.seps else files_pattern).match(relpath)
+			action = actions[int(m.lastgroup[1:])] if m else None # type: ignore [index]
+			if len(self._results) >= PathFilter._max_results:
+				self._results.clear()
+			self._results[relpath] = action
+		if action is None:
+			return default if default is not None else self.default
+		return action
+
+	def _combine(self) -> tuple[re.Pattern, re.Pattern, list[bool]]:
+		'''Join the segments' regexes into a single alternation, so the first matching segment is found by one `match()` in C instead of a Python loop over the segments. Returns the pattern for dirs, the pattern for files (without the dir-only segments, which can't match a file path), and the segment actions indexed by the number in the group names.'''
+
+		sources = []
+		file_sources = []
+		for i, segment in enumerate(self._segments):
+			source = segment.matcher.pattern
+			if segment.matcher.flags & re.IGNORECASE:
+				source = f"(?i:{source})"
+			# glob.translate() only makes non-capturing groups, so the named group is the one reported by lastgroup
+			source = f"(?P<g{i}>{source})"
+			sources.append(source)
+			# a segment ending with a separator must match one at the end of the path, so it only applies to dirs
+			if not segment.glob_pattern.endswith("/"):
+				file_sources.append(source)
+		# alternatives are tried in order, so the first segment that matches wins, like the loop this replaces
+		combined = (
+			re.compile("|".join(sources) or "(?!)"),
+			re.compile("|".join(file_sources) or "(?!)"),
+			[segment.action for segment in self._segments],
+		)
+		# published with a single assignment, so other threads see either nothing or the complete set
+		self._combined = combined
+		return combined
+
+	def matches_all(self) -> bool:
+		'''Whether the allow segments before the first reject segment match every file and directory, including hidden ones.'''
+
+		patterns = set()
 		for segment in self._segments:
-			if segment.matcher.match(relpath):
-				return segment.action
-		return default if default is not None else self.default
+			if not segment.action:
+				break
+			patterns.add(segment.matcher.pattern)
+		return PathFilter._match_all in patterns or PathFilter._match_all_files in patterns and PathFilter._match_all_dirs in patterns
 
 	def __str__(self) -> str:
 		_str = ""
@@ -398,7 +480,12 @@ class AllFilter(Filter):
 	def filter(self, relpath:str, *, root:_AbstractPath|str|None = None, default:bool|None = None) -> bool:
 		'''Filter paths by accepting only those that pass all constiuent `Filters`.'''
 
-		if all(f.filter(relpath, root=root) for f in self.filters):
-			return True
-		else:
-			return default if default is not None else self.default
+		for f in self.filters:
+			if not f.filter(relpath, root=root):
+				return default if default is not None else self.default
+		return True
+
+	def matches_all(self) -> bool:
+		'''Whether every constituent `Filter` allows every path.'''
+
+		return all(f.matches_all() for f in self.filters)
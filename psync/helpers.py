@@ -1,6 +1,5 @@
 import time
 import threading
-from datetime import datetime
 from typing import Any
 
 from .errors import IncompatiblePathError
@@ -8,6 +7,7 @@ from .errors import IncompatiblePathError
 class _UniqueIDGenerator:
 	_last_time = 0
 	_counter = 0
+	_prefix = "" # formatted _last_time
 	_lock = threading.Lock()
 
 	@classmethod
@@ -28,11 +28,11 @@ class _UniqueIDGenerator:
 				cls._last_time += 1
 				current_time = cls._last_time
 
-			dt = datetime.fromtimestamp(cls._last_time)
-			unique_id = dt.strftime("%Y%m%d_%H%M%S")
+			# _last_time only changes when the counter is reset, so the formatted time is reused within the same second
 			if cls._counter:
-				unique_id += f".{cls._counter}"
-			return unique_id
+				return f"{cls._prefix}.{cls._counter}"
+			cls._prefix = time.strftime("%Y%m%d_%H%M%S", time.localtime(cls._last_time))
+			return cls._prefix
 
 def _reverse_dict(old_dict:dict[Any, Any]) -> dict[Any, Any]:
 	'''
@@ -46,10 +46,9 @@ def _reverse_dict(old_dict:dict[Any, Any]) -> dict[Any, Any]:
 
 	reversed:dict[Any, Any] = {}
 	for key, val in old_dict.items():
-		if val in reversed:
+		# one lookup for the common case of a unique value; distinct keys are never the same object
+		if reversed.setdefault(val, key) is not key:
 			reversed[val] = None
-		else:
-			reversed[val] = key
 	return reversed
 
 def _merge_iters(src, dst, *, key=lambda x: x):
@@ -66,16 +65,18 @@ def _merge_iters(src, dst, *, key=lambda x: x):
 
 	src_iter = iter(src)
 	dst_iter = iter(dst)
+	src_next = src_iter.__next__ # bound once, called per element
+	dst_next = dst_iter.__next__
 	stopped  = object()
 
 	try:
 		try:
-			s = next(src_iter)
+			s = src_next()
 			s_comp = key(s)
 		except StopIteration:
 			s = stopped
 		try:
-			d = next(dst_iter)
+			d = dst_next()
 			d_comp = key(d)
 		except StopIteration:
 			d = stopped
@@ -86,12 +87,12 @@ def _merge_iters(src, dst, *, key=lambda x: x):
 			while s_comp == d_comp:
 				yield 0, s, d
 				try:
-					s = next(src_iter)
+					s = src_next()
 					s_comp = key(s)
 				except StopIteration:
 					s = stopped
 				try:
-					d = next(dst_iter)
+					d = dst_next()
 					d_comp = key(d)
 				except StopIteration:
 					d = stopped
@@ -101,7 +102,7 @@ def _merge_iters(src, dst, *, key=lambda x: x):
 			while s_comp < d_comp:
 				yield -1, s, d
 				try:
-					s = next(src_iter)
+					s = src_next()
 					s_comp = key(s)
 				except StopIteration:
 					s = stopped
@@ -110,7 +111,7 @@ def _merge_iters(src, dst, *, key=lambda x: x):
 			while s_comp > d_comp:
 				yield 1, s, d
 				try:
-					d = next(dst_iter)
+					d = dst_next()
 					d_comp = key(d)
 				except StopIteration:
 					d = stopped
@@ -126,6 +127,37 @@ def _merge_iters(src, dst, *, key=lambda x: x):
 			yield -1, s, None
 			yield from ((-1,s,None) for s in src_iter)
 
+# Same rules `ntpath.isreserved` applies to each path component
+_NT_RESERVED_CHARS = frozenset({chr(i) for i in range(32)} | set('"*:<>?|/\\'))
+_NT_RESERVED_NAMES = frozenset(
+	{"CON", "PRN", "AUX", "NUL", "CONIN$", "CONOUT$"} |
+	{f"COM{c}" for c in "123456789\xb9\xb2\xb3"} |
+	{f"LPT{c}" for c in "123456789\xb9\xb2\xb3"}
+)
+_NT_RESERVED_FIRST_CHARS = frozenset("cCpPaAnNlL") # most names can be ruled out by their first char alone
+
+def _is_reserved_nt_name(name:str) -> bool:
+	'''
+	Returns `True` if `name`, a single path component, is reserved on Windows: it ends with a dot or space, contains a character Windows doesn't allow in names, or is a reserved device name (with any extension). These are the checks `ntpath.isreserved` makes on each component. Unlike `ntpath.isreserved`, no drive or separators are split off first, so a name like `"a:b"` is reserved because of its `":"`.
+
+	>>> _is_reserved_nt_name("nul.txt")
+	True
+	>>> _is_reserved_nt_name("a:b")
+	True
+	>>> _is_reserved_nt_name("a.")
+	True
+	>>> _is_reserved_nt_name("console")
+	False
+	'''
+
+	if name[-1:] in (".", " "):
+		return name not in (".", "..")
+	if not _NT_RESERVED_CHARS.isdisjoint(name):
+		return True
+	if name[:1] not in _NT_RESERVED_FIRST_CHARS:
+		return False
+	return name.partition(".")[0].rstrip(" ").upper() in _NT_RESERVED_NAMES
+
 def _convert_sep(path:str, src_sep:str, dst_sep:str):
 	r'''
 	Translates `src_sep` (path separators) in  `path` to `dst_sep`.
@@ -157,6 +189,8 @@ def _convert_sep(path:str, src_sep:str, dst_sep:str):
 		else:
 			return path.replace("/", "\\")
 
+_SIZE_UNITS = ("bytes", "KB", "MB", "GB", "TB", "PB")
+
 def _human_readable_size(n:int) -> str:
 	'''
 	Translates `n` bytes into a human-readable size.
@@ -177,9 +211,8 @@ def _human_readable_size(n:int) -> str:
 		sign = ""
 
 	n = abs(n)
-	units = ["bytes", "KB", "MB", "GB", "TB", "PB"]
-	i = 0
-	while n >= 1024 and i < len(units) - 1:
-		n //= 1024
-		i += 1
-	return f"{sign}{round(n)} {units[i]}"
+	# each unit is 10 more bits
+	i = min((int(n).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if n >= 1024 else 0
+	if i:
+		n //= 1 << (10 * i)
+	return f"{sign}{round(n)} {_SIZE_UNITS[i]}"
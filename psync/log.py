@@ -1,5 +1,4 @@
 import sys
-import os
 import logging
 from enum import Enum
 
@@ -14,15 +13,16 @@ def _exc_summary(e) -> str:
 	'''Get a one-line summary of an `Exception`.'''
 
 	error_type = type(e).__name__
-	affected_file = getattr(e, "filename", None)
-	error_message = getattr(e, "strerror", None)
-	if isinstance(e, OSError) and affected_file:
-		msg = f"{error_type}: {affected_file}"
-	elif error_message:
-		msg = f"{error_type}: {error_message}"
+	if isinstance(e, OSError):
+		# always set on OSError, so no getattr() probes are needed for the common case
+		if e.filename:
+			return f"{error_type}: {e.filename}"
+		error_message = e.strerror
 	else:
-		msg = str(e)
-	return msg
+		error_message = getattr(e, "strerror", None)
+	if error_message:
+		return f"{error_type}: {error_message}"
+	return str(e)
 
 class _DebugInfoFilter(logging.Filter):
 	'''Logging filter that only allows DEBUG and INFO records to pass.'''
@@ -34,7 +34,11 @@ class _NonEmptyFilter(logging.Filter):
 	'''Logging filter that only allows non-empty messages.'''
 
 	def filter(self, record):
-		return bool(str(record.msg).strip())
+		msg = record.msg
+		# messages are almost always str already, so skip the copy
+		if not isinstance(msg, str):
+			msg = str(msg)
+		return bool(msg) and not msg.isspace()
 
 class _Formatter(logging.Formatter):
 	'''Logging formatter for records printed to the console.'''
@@ -48,11 +52,13 @@ class _Formatter(logging.Formatter):
 	def format(self, record):
 		msg = super().format(record)
 		extra_indent = "" if getattr(record, "Operation", None) else "  "
-		if record.levelno == logging.DEBUG:
-			msg = extra_indent + msg.replace("\n", f"\n  {extra_indent}").rstrip(" ")
-		else:
-			msg = extra_indent + msg.replace("\n", f"\n{extra_indent}").rstrip(" ")
-		return msg
+		# most records are a single line
+		if "\n" in msg:
+			if record.levelno == logging.DEBUG:
+				msg = msg.replace("\n", f"\n  {extra_indent}")
+			else:
+				msg = msg.replace("\n", f"\n{extra_indent}")
+		return extra_indent + msg.rstrip(" ")
 
 class _RichConsoleFormatter(_Formatter):
 
@@ -76,11 +82,36 @@ class _RichConsoleFormatter(_Formatter):
 
 		return msg
 
+def _enable_windows_ansi() -> None:
+	'''Turn on ANSI escape code processing for the console's stdout and stderr. Same effect as the `os.system("")` trick, without spawning a shell.'''
+
+	import ctypes
+	from ctypes import wintypes
+	# a private instance, so the prototypes set here don't affect other users of ctypes.windll
+	kernel32 = ctypes.WinDLL("kernel32") # type: ignore [attr-defined]
+	# without these, HANDLEs would be truncated to a C int on 64-bit Windows
+	kernel32.GetStdHandle.restype    = wintypes.HANDLE
+	kernel32.GetStdHandle.argtypes   = (wintypes.DWORD,)
+	kernel32.GetConsoleMode.restype  = wintypes.BOOL
+	kernel32.GetConsoleMode.argtypes = (wintypes.HANDLE, wintypes.LPDWORD)
+	kernel32.SetConsoleMode.restype  = wintypes.BOOL
+	kernel32.SetConsoleMode.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+	INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+	for std_handle in (-11, -12): # STD_OUTPUT_HANDLE, STD_ERROR_HANDLE
+		handle = kernel32.GetStdHandle(wintypes.DWORD(std_handle).value)
+		if handle is None or handle == INVALID_HANDLE_VALUE:
+			continue
+		mode = wintypes.DWORD()
+		# fails when the stream isn't a console (e.g., redirected to a file), where nothing needs to be done
+		if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+			kernel32.SetConsoleMode(handle, mode.value | 0x0004) # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+
 logger = logging.getLogger("psync")
 
 # enable ANSI escape codes on Windows
 if sys.platform == "win32":
-	os.system("")
+	_enable_windows_ansi()
 
 logger.setLevel(logging.INFO)
 handler_stdout = logging.StreamHandler(sys.stdout)
@@ -10,10 +10,10 @@ from pathlib import Path, PurePath, PureWindowsPath, PurePosixPath
 from functools import cached_property
 from datetime import datetime
 from dataclasses import dataclass
-from typing import Iterator
+from typing import Iterable, Iterator, ClassVar
 
 from .config import _SyncConfig
-from .dual_walk import _Relpath, _File, _Dir, _Diff, _DualWalk
+from .dual_walk import _Relpath, _File, _Dir, _Diff, _DualWalk, _in_lineage
 from .helpers import _convert_sep
 from .sftp import RemotePath
 from .types import _AbstractPath
@@ -174,11 +174,25 @@ class Operation:
 	target    : _Relpath | None = None
 	byte_diff : int = 0
 
+	batchable : ClassVar[bool] = False # adjacent operations of this type in the same dst dir may be passed together to `perform_many()`
+
 	def perform(self):
 		'''Perform the filesystem operation associated with this object.'''
 
 		raise NotImplementedError()
 
+	@classmethod
+	def perform_many(cls, ops:Iterable["Operation"]) -> Iterator[tuple["Operation", OSError|None]]:
+		'''Perform a batch of `Operation`s of this type, yielding each one after it is performed along with the error it raised, if any. `ops` is consumed lazily, so the next `Operation` is not taken from it until the previous one has been yielded.'''
+
+		for op in ops:
+			try:
+				op.perform()
+			except OSError as e:
+				yield op, e
+			else:
+				yield op, None
+
 	def depends_on(self, op:"Operation"):
 		'''Returns `True` if this Operation would fail if the Operation `op` were to fail beforehand or not to occur.'''
 
@@ -263,7 +277,7 @@ class DeleteFileOperation(Operation):
 	def __lt__(self, other):
 		if other.dst.relpath == ".":
 			return True
-		if all(a==b for a,b in zip(self.dst.norm, other.dst.norm)):
+		if _in_lineage(self.dst.norm, other.dst.norm):
 			return len(self.dst.norm) >= len(other.dst.norm)
 		else:
 			return self.dst.norm < other.dst.norm
@@ -284,7 +298,7 @@ class DeleteDirOperation(Operation): # Empty dirs only
 	def __lt__(self, other):
 		if other.dst.relpath == ".":
 			return True
-		if all(a==b for a,b in zip(self.dst.norm, other.dst.norm)):
+		if _in_lineage(self.dst.norm, other.dst.norm):
 			return len(self.dst.norm) >= len(other.dst.norm)
 		else:
 			return self.dst.norm < other.dst.norm
@@ -305,7 +319,7 @@ class TrashFileOperation(Operation):
 	def __lt__(self, other):
 		if other.dst.relpath == ".":
 			return True
-		if all(a==b for a,b in zip(self.dst.norm, other.dst.norm)):
+		if _in_lineage(self.dst.norm, other.dst.norm):
 			return len(self.dst.norm) >= len(other.dst.norm)
 		else:
 			return self.dst.norm < other.dst.norm
@@ -328,7 +342,7 @@ class TrashDirOperation(Operation): # Empty dirs only
 	def __lt__(self, other):
 		if other.dst.relpath == ".":
 			return True
-		if all(a==b for a,b in zip(self.dst.norm, other.dst.norm)):
+		if _in_lineage(self.dst.norm, other.dst.norm):
 			return len(self.dst.norm) >= len(other.dst.norm)
 		else:
 			return self.dst.norm < other.dst.norm
@@ -344,6 +358,8 @@ class TrashDirOperation(Operation): # Empty dirs only
 
 @dataclass(frozen=True)
 class UpdateFileOperation(Operation):
+	batchable = True
+
 	def __post_init__(self):
 		assert self.src is not None
 		assert self.target is None
@@ -352,12 +368,18 @@ class UpdateFileOperation(Operation):
 		assert self.src is not None
 		_copy(self.config.src / self.src, self.config.dst / self.dst, follow_symlinks=self.config.follow_symlinks)
 
+	@classmethod
+	def perform_many(cls, ops:Iterable[Operation]) -> Iterator[tuple[Operation, OSError|None]]:
+		yield from _copy_many(ops)
+
 	@property
 	def summary(self):
 		return f"U {self.config.dst_name}{self.config.dst_sep.join(self.dst.real)}"
 
 @dataclass(frozen=True)
 class CreateFileOperation(Operation):
+	batchable = True
+
 	def __post_init__(self):
 		assert self.src is not None
 		assert self.target is None
@@ -366,6 +388,10 @@ class CreateFileOperation(Operation):
 		assert self.src is not None
 		_copy(self.config.src / self.src, self.config.dst / self.dst, follow_symlinks=self.config.follow_symlinks)
 
+	@classmethod
+	def perform_many(cls, ops:Iterable[Operation]) -> Iterator[tuple[Operation, OSError|None]]:
+		yield from _copy_many(ops)
+
 	@property
 	def summary(self):
 		return f"+ {self.config.dst_name}{self.config.dst_sep.join(self.dst.real)}"
@@ -483,7 +509,7 @@ class _OperationFactory:
 		self.config = config
 
 	def get_rename_ops(self, dst_relpath:_Relpath, target_relpath:_Relpath) -> Iterator[Operation]:
-		if isinstance(dst_relpath, _File):
+		if not isinstance(dst_relpath, _Dir):
 			yield RenameFileOperation(
 				config  = self.config,
 				dst     = dst_relpath,
@@ -498,7 +524,7 @@ class _OperationFactory:
 			)
 
 	def get_delete_ops(self, dst_relpath:_Relpath, diff:_Diff) -> Iterator[Operation]:
-		if isinstance(dst_relpath, _File):
+		if not isinstance(dst_relpath, _Dir):
 			if self.config.trash:
 				yield TrashFileOperation(
 					config    = self.config,
@@ -524,11 +550,13 @@ class _OperationFactory:
 				)
 
 	def get_update_ops(self, src_relpath:_Relpath, dst_relpath:_Relpath, diff:_Diff) -> Iterator[Operation]:
-		if isinstance(dst_relpath, _File):
+		if not isinstance(dst_relpath, _Dir):
 			assert isinstance(src_relpath, _File)
-			src_time = diff.src_file_metadata[src_relpath].mtime
-			dst_time = diff.dst_file_metadata[dst_relpath].mtime
-			byte_diff = diff.src_file_metadata[src_relpath].size - diff.dst_file_metadata[dst_relpath].size
+			src_meta = diff.src_file_metadata[src_relpath]
+			dst_meta = diff.dst_file_metadata[dst_relpath]
+			src_time = src_meta.mtime
+			dst_time = dst_meta.mtime
+			byte_diff = src_meta.size - dst_meta.size
 
 			do_update = False
 
@@ -566,7 +594,7 @@ class _OperationFactory:
 			#	)
 
 	def get_create_ops(self, dst_relpath:_Relpath, diff:_Diff) -> Iterator[Operation]:
-		if isinstance(dst_relpath, _File):
+		if not isinstance(dst_relpath, _Dir):
 			if not self.config.follow_symlinks and (self.config.src / dst_relpath).is_symlink():
 				yield CreateSymlinkOperation(
 					config    = self.config,
@@ -588,8 +616,31 @@ class _OperationFactory:
 				dst     = dst_relpath,
 			)
 
-def _copy(src:_AbstractPath, dst:_AbstractPath, *, exist_ok:bool = True, follow_symlinks:bool = False) -> None:
-	'''Copy file from `src` to `dst`, keeping timestamp metadata. Existing files will be overwritten if `exist_ok` is `True`. Otherwise this method will raise a `FileExistsError`.'''
+def _copy_many(ops:Iterable[Operation]) -> Iterator[tuple[Operation, OSError|None]]:
+	'''Perform copy `Operation`s that share a dst directory, creating that directory only once. Each `Operation` is yielded after it is performed along with the error it raised, if any. If the directory can't be created, every `Operation` is yielded with that error.'''
+
+	mkdir_error : OSError|None = None
+	for i, op in enumerate(ops):
+		config = op.config
+		if i == 0:
+			try:
+				(config.dst / op.dst).parent.mkdir(parents=True, exist_ok=True)
+			except OSError as e:
+				mkdir_error = e
+		if mkdir_error is not None:
+			yield op, mkdir_error
+			continue
+
+		assert op.src is not None
+		try:
+			_copy(config.src / op.src, config.dst / op.dst, follow_symlinks=config.follow_symlinks, make_parents=False)
+		except OSError as e:
+			yield op, e
+		else:
+			yield op, None
+
+def _copy(src:_AbstractPath, dst:_AbstractPath, *, exist_ok:bool = True, follow_symlinks:bool = False, make_parents:bool = True) -> None:
+	'''Copy file from `src` to `dst`, keeping timestamp metadata. Existing files will be overwritten if `exist_ok` is `True`. Otherwise this method will raise a `FileExistsError`. Set `make_parents` to `False` if the parent of `dst` is known to exist.'''
 
 	if dst.exists():
 		if not exist_ok:
@@ -600,8 +651,9 @@ def _copy(src:_AbstractPath, dst:_AbstractPath, *, exist_ok:bool = True, follow_
 	dst_tmp = dst.with_name(dst.name + ".tempcopy")
 	try:
 		# Copy into a temp file, with metadata
-		dir = dst.parent
-		dir.mkdir(parents=True, exist_ok=True)
+		if make_parents:
+			dir = dst.parent
+			dir.mkdir(parents=True, exist_ok=True)
 		if isinstance(src, Path) and isinstance(dst_tmp, Path):
 			shutil.copy2(src, dst_tmp, follow_symlinks=follow_symlinks)
 		else:
@@ -620,14 +672,12 @@ def _move(src:_AbstractPath, dst:_AbstractPath, *, exist_ok:bool = False) -> Non
 		elif not dst.is_file():
 			raise FileExistsError(17, f"Cannot move {src}, dst is not a file", str(dst))
 
-	if isinstance(src, Path) and isinstance(dst, Path):
-		pass
-	elif isinstance(src, Path):
-		raise ValueError("Cannot move 'src' given by a Path to location given by RemotePath.")
-	elif isinstance(dst, Path):
-		raise ValueError("Cannot move 'src' given by a RemotePath to location given by Path.")
-	else:
-		pass
+	src_is_local = isinstance(src, Path)
+	if src_is_local is not isinstance(dst, Path):
+		if src_is_local:
+			raise ValueError("Cannot move 'src' given by a Path to location given by RemotePath.")
+		else:
+			raise ValueError("Cannot move 'src' given by a RemotePath to location given by Path.")
 
 	# move the file
 	dir = dst.parent
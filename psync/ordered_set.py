@@ -41,6 +41,11 @@ except ImportError:
 		def update(self, _set: AbstractSet[T]) -> None:
 			super().__ior__(_set)
 
+		def difference_update(self, *sets: AbstractSet[T]) -> None:
+			for _set in sets:
+				for element in _set:
+					self._items.pop(element, None)
+
 		def __repr__(self) -> str:
 			elements = ", ".join(repr(x) for x in self._items.keys())
 			return f"OrderedSet([{elements}])"
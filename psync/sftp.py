@@ -519,6 +519,9 @@ class RemotePath:
 		for st in RemotePath.sftp_connections[self.netloc].listdir_iter(str(self), read_aheads=1):
 			entry = self / st.filename
 			entry._lstat = st
+			if st.st_mode is not None and not stat.S_ISLNK(st.st_mode):
+				# same as in stat(), so is_dir(), is_file(), and stat() don't need another round trip when following symlinks
+				entry._stat = st
 			yield entry
 
 	def chmod(self, mode, *, follow_symlinks:bool = True) -> None:
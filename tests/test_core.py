@@ -3,11 +3,12 @@
 
 import os
 import unittest
+import unittest.mock
 import logging
 import tempfile
 from pathlib import Path
 
-from psync import core, operations, filter, log
+from psync import core, operations, filter, log, dual_walk
 from .helpers import *
 
 class TestSync(unittest.TestCase):
@@ -648,6 +649,71 @@ class TestSync(unittest.TestCase):
 
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+	def test_run__renames_hardlinks(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			root = Path(temp_root)
+			file_structure = {
+				"src": {
+					"a": ("1", 1),
+					"b": ("2", 1), # same metadata as "a"
+				},
+				"dst": {
+				},
+			}
+			create_file_structure(root, file_structure)
+			src = root / "src"
+			dst = root / "dst"
+			os.link(src / "a", dst / "a2")
+
+			results = core.Sync(
+				src,
+				dst,
+				delete_files = True,
+				rename_threshold = 0,
+				print_level = 100,
+			).run()
+
+			self.assertTrue(results.status == core.Results.Status.COMPLETED)
+			self.assertEqual(hash_directory(src), hash_directory(dst))
+			self.assertEqual(results[operations.RenameFileOperation].success, 1)
+			self.assertEqual(results[operations.CreateFileOperation].success, 1)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	def test_run__renames_hardlinks_ambiguous(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			root = Path(temp_root)
+			file_structure = {
+				"src": {
+					"a": ("1", 1),
+					"b": ("2", 1), # same metadata as "a"
+				},
+				"dst": {
+				},
+			}
+			create_file_structure(root, file_structure)
+			src = root / "src"
+			dst = root / "dst"
+			os.link(src / "a", dst / "a2")
+			os.link(src / "b", dst / "b2")
+
+			results = core.Sync(
+				src,
+				dst,
+				delete_files = True,
+				rename_threshold = 0,
+				print_level = 100,
+			).run()
+
+			# metadata can't tell the files apart, so each one is paired by file ID
+			self.assertTrue(results.status == core.Results.Status.COMPLETED)
+			self.assertEqual(hash_directory(src), hash_directory(dst))
+			self.assertEqual(results[operations.RenameFileOperation].success, 2)
+			self.assertEqual(results[operations.CreateFileOperation].success, 0)
+			self.assertEqual(results[operations.DeleteFileOperation].success, 0)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 	def test_run__renames2(self):
 		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
 			root = Path(temp_root)
@@ -683,6 +749,58 @@ class TestSync(unittest.TestCase):
 
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+	def test_run__renames_nested_dir(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			root = Path(temp_root)
+			file_structure = {
+				"src": {
+					"a": {
+						"b": {
+							"c": {
+								"1": ("same", 1),
+								"2": ("same", 1),
+							},
+							"3": ("same", 1),
+						},
+						"4": ("same", 1),
+					},
+				},
+				"dst": {
+					"a2": {
+						"b": {
+							"c": {
+								"1": ("same", 1),
+								"2": ("same", 1),
+							},
+							"3": ("same", 1),
+						},
+						"4": ("same", 1),
+					},
+				},
+			}
+			create_file_structure(root, file_structure)
+			src = root / "src"
+			dst = root / "dst"
+
+			results = core.Sync(
+				src,
+				dst,
+				delete_files = True,
+				print_level = 100,
+			).run()
+
+			self.assertTrue(results.status == core.Results.Status.COMPLETED)
+			self.assertEqual(hash_directory(src), hash_directory(dst))
+
+			# the files' metadata is ambiguous, so they can't be renamed on their own, but they move with their dir
+			self.assertEqual(results.failure_count, 0)
+			self.assertEqual(results[operations.RenameDirOperation].success, 1)
+			self.assertEqual(results[operations.RenameFileOperation].success, 0)
+			self.assertEqual(results[operations.CreateFileOperation].success, 0)
+			self.assertEqual(results[operations.DeleteFileOperation].success, 0)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 	def test_run__rename_blocked(self):
 		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
 			root = Path(temp_root)
@@ -930,3 +1048,136 @@ class TestSync(unittest.TestCase):
 			self.assertTrue(results.status == core.Results.Status.COMPLETED)
 			self.assertEqual(hash_directory(src), hash_directory(dst))
 			self.assertEqual(results[operations.CreateFileOperation].success, 0)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	def test_run__batch_into_new_dir(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			root = Path(temp_root)
+			file_structure = {
+				"src": {
+					"new": {
+						"a": None,
+						"b": None,
+						"c": None,
+					},
+				},
+			}
+			create_file_structure(root, file_structure)
+			src = root / "src"
+			dst = root / "dst"
+			dst.mkdir()
+
+			# the walk would create the dir with its own op, so feed the runner the file ops directly
+			def operations_iterator(config):
+				File = lambda relpath: dual_walk._File(relpath, config.dst_sep, config.dst_sys)
+				return [
+					operations.CreateFileOperation(config=config, src=File(relpath), dst=File(relpath))
+					for relpath in ("new/a", "new/b", "new/c")
+				]
+
+			with unittest.mock.patch.object(core, "_OperationsIterator", operations_iterator):
+				results = core.Sync(
+					src,
+					dst,
+					print_level = 100,
+				).run()
+
+			# the batch creates the missing dst dir once, then copies every file into it
+			self.assertTrue(results.status == core.Results.Status.COMPLETED)
+			self.assertEqual(results[operations.CreateFileOperation], (3, 0))
+			self.assertEqual(hash_directory(src), hash_directory(dst))
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	def test_run__batch_mkdir_fails(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			root = Path(temp_root)
+			file_structure = {
+				"src": {
+					"bad": {
+						"a": None,
+						"b": None,
+					},
+					"good": {
+						"c": None,
+					},
+				},
+				"dst": {
+					"bad": None, # a file where the batch's dir should be
+				},
+			}
+			create_file_structure(root, file_structure)
+			src = root / "src"
+			dst = root / "dst"
+
+			# the walk would skip the conflicting "bad" dir, so feed the runner its ops directly
+			def operations_iterator(config):
+				File = lambda relpath: dual_walk._File(relpath, config.dst_sep, config.dst_sys)
+				return [
+					operations.CreateFileOperation(config=config, src=File(relpath), dst=File(relpath))
+					for relpath in ("bad/a", "bad/b", "good/c")
+				]
+
+			with unittest.mock.patch.object(core, "_OperationsIterator", operations_iterator):
+				results = core.Sync(
+					src,
+					dst,
+					print_level = 100,
+				).run()
+
+			self.assertTrue(results.status == core.Results.Status.COMPLETED)
+
+			# every op in the failed batch reports the mkdir error
+			self.assertEqual([op.dst.relpath for op, _ in results.sync_errors], ["bad/a", "bad/b"])
+			for _, e in results.sync_errors:
+				self.assertIsInstance(e, FileExistsError)
+
+			# the next batch still runs
+			self.assertEqual(results[operations.CreateFileOperation], (1, 2))
+			self.assertTrue((dst / "good" / "c").is_file())
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+	def test_run__log_order(self):
+		with tempfile.TemporaryDirectory(suffix=None, prefix=None, dir=None) as temp_root:
+			root = Path(temp_root)
+			file_structure = {
+				"src": {
+					"a": {
+						"n1": ("new", 1),
+						"n2": ("new", 1),
+					},
+					"b": {
+						"o": ("src", 1),
+					},
+				},
+				"dst": {
+					"a": {
+					},
+					"b": {
+						"o": ("dst", 2),
+					},
+				},
+			}
+			create_file_structure(root, file_structure)
+			src = root / "src"
+			dst = root / "dst"
+			log_file = root / "sync.log"
+
+			results = core.Sync(
+				src,
+				dst,
+				low_memory = True,
+				print_level = 100,
+				log_file = log_file,
+				file_level = logging.INFO,
+			).run()
+
+			self.assertTrue(results.status == core.Results.Status.COMPLETED)
+
+			# each op is logged when it's performed, before the walk reaches "b" and warns about "o"
+			lines = log_file.read_text().splitlines()
+			index = lambda text: next(i for i, line in enumerate(lines) if text in line)
+			self.assertLess(index("dst/a/n1"), index("newer"))
+			self.assertLess(index("dst/a/n2"), index("newer"))
@@ -2,7 +2,9 @@
 # GNU General Public License v3.0
 
 import os
+import sys
 import unittest
+import threading
 import logging
 
 from psync import core, filter, helpers, sftp, watch
@@ -137,6 +139,52 @@ class TestFilter(unittest.TestCase):
 		self.assertFalse(f.filter("b/.c"))
 		self.assertTrue(f.filter(".d"))
 
+	def test_pathfilter__matches_all(self):
+		self.assertTrue(filter.PathFilter("+ **/*").matches_all())
+		self.assertTrue(filter.PathFilter("**").matches_all())
+		self.assertTrue(filter.PathFilter("+ **/* - a").matches_all())
+		self.assertFalse(filter.PathFilter("- a + **/*").matches_all())
+		self.assertFalse(filter.PathFilter("+ *").matches_all())
+		self.assertFalse(filter.PathFilter("+ **/*", ignore_hidden=True).matches_all())
+
+	def test_pathfilter__add_after_filter(self):
+		f = filter.PathFilter("a")
+		self.assertFalse(f.filter("b"))
+		f.allow("b")
+		self.assertTrue(f.filter("b"))
+		f.reject("c")
+		self.assertFalse(f.filter("c", default=True))
+		self.assertTrue(f.filter("d", default=True))
+
+	def test_pathfilter__concurrent_first_filter(self):
+		# src and dst may be listed in separate threads, which both call filter() on a fresh PathFilter
+		filter_string = " ".join(f"d{i}/ f{i}" for i in range(50))
+		# switch threads as often as possible, so they interleave inside the first filter() call
+		interval = sys.getswitchinterval()
+		sys.setswitchinterval(1e-6)
+		self.addCleanup(sys.setswitchinterval, interval)
+		for _ in range(100):
+			f = filter.PathFilter(filter_string)
+			barrier = threading.Barrier(4)
+			errors = []
+			def check(relpath, expected):
+				barrier.wait()
+				try:
+					self.assertEqual(f.filter(relpath), expected)
+				except Exception as e:
+					errors.append(e)
+			threads = [
+				threading.Thread(target=check, args=("f49", True)),
+				threading.Thread(target=check, args=("d49/", True)),
+				threading.Thread(target=check, args=("x", False)),
+				threading.Thread(target=check, args=("x/", False)),
+			]
+			for t in threads:
+				t.start()
+			for t in threads:
+				t.join()
+			self.assertEqual(errors, [])
+
 	def test_pathfilter__relpaths(self):
 		f = filter.PathFilter("./0 a/ b/ ./1 c/ c/d/ ./2")
 		self.assertTrue(f.filter("0"))
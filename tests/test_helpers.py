@@ -0,0 +1,26 @@
+# Copyright (c) 2025 Joe Walter
+# GNU General Public License v3.0
+
+import ntpath
+import unittest
+import itertools
+
+from psync import helpers
+
+class TestHelpers(unittest.TestCase):
+
+	@unittest.skipUnless(hasattr(ntpath, "isreserved"), "ntpath.isreserved requires Python 3.13+")
+	def test_is_reserved_nt_name__matches_ntpath(self):
+		stems = ["a", "file", "con", "CON", "Con", "console", "nul", "prn", "aux", "conin$", "CONOUT$", "com1", "COM9", "com0", "com\xb9", "lpt\xb2", "lpt10", "lpt", "c", "l"]
+		suffixes = ["", ".txt", ".tar.gz", " ", ".", " .txt", "  ", "..", "*", "?", "<", ">", "|", '"', "\x00", "\x1f", "\x7f", "\xe9"]
+		names = [stem + suffix for stem, suffix in itertools.product(stems, suffixes)]
+		names += [".", "..", "...", " ", ".a", " a", "a b", "a.b.c"]
+
+		for name in names:
+			with self.subTest(name=name):
+				self.assertEqual(helpers._is_reserved_nt_name(name), ntpath.isreserved(name))
+
+		# ntpath.isreserved splits off a drive or separators first, but a single name can't contain either
+		for name in ["a:b", "con:", "a/b", "a\\b", "c:"]:
+			with self.subTest(name=name):
+				self.assertTrue(helpers._is_reserved_nt_name(name))